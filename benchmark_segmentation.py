@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Times JapaneseSegmenter on long texts with and without parallel chunked tokenization.
+
+Use this to pick RUBIFY_PARALLEL_SEGMENTATION_THRESHOLD for a given host, e.g.:
+
+    python benchmark_segmentation.py --thresholds 1024 4096 16384 --sizes 2000 20000 200000
+"""
+import argparse
+import os
+import time
+
+from src.segmentation import JapaneseSegmenter
+
+sentence = "私はその人を常に先生と呼んでいた。だからここでもただ先生と書くだけで本名は打ち明けない。\n"
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sizes", type=int, nargs="+", default=[2_000, 20_000, 200_000])
+parser.add_argument("--thresholds", type=int, nargs="+", default=[1_024, 4_096, 16_384])
+parser.add_argument("--workers", type=int, default=os.cpu_count())
+parser.add_argument("--repeat", type=int, default=5)
+args = parser.parse_args()
+
+segmenters = {"serial": JapaneseSegmenter(parallel_threshold=None)}
+for threshold in args.thresholds:
+    segmenters[f"parallel@{threshold}"] = JapaneseSegmenter(
+        parallel_threshold=threshold, max_workers=args.workers
+    )
+
+print(f"workers: {args.workers}")
+for size in args.sizes:
+    text = (sentence * (size // len(sentence) + 1))[:size]
+    for name, segmenter in segmenters.items():
+        # warm up the per-thread tokenizers
+        segmenter.segment(text)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            segmenter.segment(text)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{size:>9} chars  {name:<16} {elapsed * 1000:9.2f} ms")
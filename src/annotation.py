@@ -1,10 +1,10 @@
 # need to use regex since standard library re does not support matching unicode properties
-from typing import Protocol
+from typing import Iterable, Mapping, Protocol
 from difflib import get_close_matches
 from .cjk_util import is_han_regexp, contains_han_regexp, segment_on_han
 
-from .segmentation import Lexeme
-from .pronunciation import CjkPronunciationProvider
+from .segmentation import Lexeme, Pronunciation
+from .pronunciation import CjkPronunciationEntry, CjkPronunciationProvider
 from .models import AnnotateRequest, AnnotatedTextSegment, Annotation, Language
 
 import logging
@@ -13,12 +13,12 @@ logging.getLogger(__name__)
 
 
 class AnnotationProvider(Protocol):
-    def annotate(self, lexemes: list[Lexeme]) -> list[AnnotatedTextSegment]: ...
+    def annotate(self, lexemes: Iterable[Lexeme]) -> list[AnnotatedTextSegment]: ...
     def can_annotate(self, request: AnnotateRequest) -> bool: ...
 
 
 class DefaultAnnotator:
-    def annotate(self, lexemes: list[Lexeme]) -> list[AnnotatedTextSegment]:
+    def annotate(self, lexemes: Iterable[Lexeme]) -> list[AnnotatedTextSegment]:
         index = 0
         segments = []
         for lexeme in lexemes:
@@ -46,12 +46,61 @@ class DefaultAnnotator:
         return True
 
 
+def resolve_reading(reading: str, pronunciations: list[str]) -> int | None:
+    """Returns the index of the pronunciation that best fits reading, or None if none fit."""
+    best_fit_pronunciation = get_close_matches(
+        reading,
+        pronunciations,
+        # at least one character should match
+        cutoff=1.0 / len(reading),
+        n=1,
+    )
+    if not best_fit_pronunciation:
+        return None
+    return pronunciations.index(best_fit_pronunciation[0])
+
+
 class FuriganaAnnotator:
 
-    def __init__(self, pronunciation_provider: CjkPronunciationProvider):
+    def __init__(
+        self,
+        pronunciation_provider: CjkPronunciationProvider,
+        # precomputed best fitting pronunciation (None for no fit), keyed on dictionary text, then sudachi reading
+        resolved_readings: Mapping[str, dict[str, str | None]] | None = None,
+    ):
         self.pronunciation_provider = pronunciation_provider
-
-    def annotate(self, lexemes: list[Lexeme]) -> list[AnnotatedTextSegment]:
+        self.resolved_readings = resolved_readings if resolved_readings is not None else {}
+
+    def best_fit(
+        self, text: str, reading: str, furigana_entries: list[CjkPronunciationEntry]
+    ) -> CjkPronunciationEntry | None:
+        for entry in furigana_entries:
+            if entry.pronunciation == reading:
+                return entry
+        resolved = self.resolved_readings.get(text)
+        if resolved and reading in resolved:
+            if resolved[reading] is None:
+                return None
+            for entry in furigana_entries:
+                if entry.pronunciation == resolved[reading]:
+                    return entry
+            # the table was built against a different dictionary; resolve at request time instead
+        index = resolve_reading(
+            reading, [entry.pronunciation for entry in furigana_entries]
+        )
+        return furigana_entries[index] if index is not None else None
+
+    def dictionary_key(self, lexeme: Lexeme) -> tuple[str, Pronunciation | None] | None:
+        """Returns the dictionary text to look lexeme up by and the pronunciation to match its entries
+        against, or None if the lexeme is not in the dictionary."""
+        if lexeme.surface in self.pronunciation_provider:
+            return lexeme.surface, lexeme.pronunciation
+        if lexeme.base_form and lexeme.base_form in self.pronunciation_provider:
+            # entries are for the uninflected form, so they are best matched by its pronunciation
+            return lexeme.base_form, lexeme.base_form_pronunciation or lexeme.pronunciation
+        return None
+
+    def annotate(self, lexemes: Iterable[Lexeme]) -> list[AnnotatedTextSegment]:
         segments = []
         segment_start = 0
         for lexeme in lexemes:
@@ -61,32 +110,20 @@ class FuriganaAnnotator:
                 segment_start = indices[1]
                 continue
 
-            if lexeme.surface in self.pronunciation_provider:
-                furigana_entries = self.pronunciation_provider[lexeme.surface]
-            elif lexeme.base_form and lexeme.base_form in self.pronunciation_provider:
-                furigana_entries = self.pronunciation_provider[lexeme.base_form]
-            else:
+            key = self.dictionary_key(lexeme)
+            if key is None:
                 segments.extend(segment_on_han(lexeme.surface, segment_start))
                 segment_start = indices[1]
                 continue
 
-            if lexeme.pronunciation:
-                best_fit_pronunciation = get_close_matches(
-                    lexeme.pronunciation.value,
-                    [entry.pronunciation for entry in furigana_entries],
-                    # at least one character should match
-                    cutoff=1.0 / len(lexeme.pronunciation.value),
-                    n=1,
-                )
-                if not best_fit_pronunciation:
+            text, reading = key
+            furigana_entries = self.pronunciation_provider[text]
+            if reading:
+                best_fit = self.best_fit(text, reading.value, furigana_entries)
+                if best_fit is None:
                     segments.extend(segment_on_han(lexeme.surface, segment_start))
                     segment_start = indices[1]
                     continue
-                best_fit = next(
-                    entry
-                    for entry in furigana_entries
-                    if entry.pronunciation == best_fit_pronunciation[0]
-                )
             else:
                 best_fit = furigana_entries[0]
 
@@ -1,34 +1,76 @@
+import hashlib
+import os
 from typing import Annotated
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
-from .pronunciation import load_furigana_json
+from .coalescing import SingleFlight
+
+from .pronunciation import (
+    load_furigana_json,
+    load_furigana_overlays,
+    load_resolved_readings,
+)
 
 from .annotation import AnnotationProvider, DefaultAnnotator, FuriganaAnnotator
 
 from .models import AnnotateRequest, AnnotatedTextSegment
 
-from .services import PriorityRegistry, SegmentationService, SegmentAnnotationService
+from .services import (
+    PriorityRegistry,
+    SegmentAnnotatePipeline,
+    SegmentationService,
+    SegmentAnnotationService,
+)
 from .segmentation import DefaultSegmenter, JapaneseSegmenter, SegmentationProvider
 
-furigana_provider = load_furigana_json(
-    # todo : yank this out into a env variable or something
-    "JmdictFurigana.json"
+furigana_provider = load_furigana_overlays(
+    load_furigana_json(
+        # todo : yank this out into a env variable or something
+        "JmdictFurigana.json"
+    ),
+    os.environ.get("RUBIFY_CUSTOM_DICTIONARY_DIR"),
+    load_resolved_readings("JmdictFuriganaResolved.json"),
 )
 
+# annotators consume lexemes as they are produced instead of from an intermediate list
+fused_pipeline = os.environ.get("RUBIFY_FUSED_PIPELINE", "0") == "1"
 
-async def get_segmentation_service():
+# texts at least this long are tokenized in parallel sentence-aligned chunks; 0 (the default) disables it
+parallel_segmentation_threshold = int(
+    os.environ.get("RUBIFY_PARALLEL_SEGMENTATION_THRESHOLD", 0)
+)
+# threads per process used for parallel tokenization; defaults to the number of CPUs
+parallel_segmentation_workers = int(
+    os.environ.get("RUBIFY_PARALLEL_SEGMENTATION_WORKERS", 0)
+)
+
+
+def build_segmentation_service() -> SegmentationService:
     registry = PriorityRegistry[SegmentationProvider]()
-    registry.register(JapaneseSegmenter(), 1)
+    registry.register(
+        JapaneseSegmenter(
+            parallel_threshold=parallel_segmentation_threshold or None,
+            max_workers=parallel_segmentation_workers or None,
+        ),
+        1,
+    )
     registry.register(DefaultSegmenter(), 0)
 
     service = SegmentationService(registry)
     return service
 
 
-async def get_segment_annotation_service():
+def build_segment_annotation_service(dictionary: str | None) -> SegmentAnnotationService:
     registry = PriorityRegistry[AnnotationProvider]()
-    registry.register(FuriganaAnnotator(furigana_provider), 1)
+    registry.register(
+        FuriganaAnnotator(
+            furigana_provider.for_dictionary(dictionary),
+            furigana_provider.resolved_readings_for_dictionary(dictionary),
+        ),
+        1,
+    )
     registry.register(DefaultAnnotator(), 0)
 
     service = SegmentAnnotationService(registry)
@@ -36,6 +78,31 @@ async def get_segment_annotation_service():
     return service
 
 
+# pipelines are compiled once per custom dictionary, rather than per request
+segmentation_service = build_segmentation_service()
+pipelines = {
+    dictionary: SegmentAnnotatePipeline(
+        segmentation_service,
+        build_segment_annotation_service(dictionary),
+        fused=fused_pipeline,
+    )
+    for dictionary in [None, *furigana_provider.overlays]
+}
+
+
+# identical concurrent requests share one computation; at most this many distinct requests are coalesced at once
+annotate_requests = SingleFlight[tuple, list[AnnotatedTextSegment]](
+    max_pending=int(os.environ.get("RUBIFY_MAX_COALESCED_REQUESTS", 1024))
+)
+
+
+async def get_pipeline(request: AnnotateRequest):
+    try:
+        return pipelines[furigana_provider.resolve_name(request.dictionary)]
+    except KeyError:
+        raise HTTPException(status_code=422, detail="Unknown dictionary")
+
+
 app = FastAPI()
 
 
@@ -44,13 +111,21 @@ def read_root():
     return {"Hello": "World"}
 
 
+@app.get("/stats")
+def read_stats():
+    return {"coalescing": annotate_requests.stats()}
+
+
 @app.post("/annotate", response_model=list[AnnotatedTextSegment], response_model_exclude_none=True)
-def annotate_base_text(
+async def annotate_base_text(
     request: AnnotateRequest,
-    segmentation_service: SegmentationService = Depends(get_segmentation_service),
-    segment_annotation_service: SegmentAnnotationService = Depends(
-        get_segment_annotation_service
-    ),
+    pipeline: SegmentAnnotatePipeline = Depends(get_pipeline),
 ):
-    segments = segmentation_service.segment(request)
-    return segment_annotation_service.annotate(request, segments)
+    key = (
+        request.language,
+        furigana_provider.resolve_name(request.dictionary),
+        hashlib.sha256(request.base_text.encode("utf-8")).digest(),
+    )
+    return await annotate_requests.run(
+        key, lambda: run_in_threadpool(pipeline.run, request)
+    )
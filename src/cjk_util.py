@@ -12,6 +12,10 @@ _kata_to_hira = OrderedDict(
 )
 is_han_regexp = re.compile(r"\p{Script=Han}", flags=re.U)
 contains_han_regexp = re.compile(r".*\p{Script=Han}.*", flags=re.U)
+# sentence-final punctuation, plus any closing brackets that trail it
+sentence_end_regexp = re.compile(r"[。．！？!?\n]+[」』）)]*", flags=re.U)
+# clause-final punctuation and whitespace, for splitting sentences that are too long to keep whole
+clause_end_regexp = re.compile(r"[、，,\s]+", flags=re.U)
 
 
 def katakana_to_hiragana(string: str) -> str:
@@ -60,3 +64,64 @@ def segment_on_han(text: str, index_offset: int = 0) -> list[AnnotatedTextSegmen
         )
 
     return segments
+
+
+def _split_after(regexp: re.Pattern, text: str) -> list[str]:
+    pieces = []
+    start = 0
+    for match in regexp.finditer(text):
+        pieces.append(text[start : match.end()])
+        start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _split_to_bytes(text: str, max_bytes: int) -> list[str]:
+    """Splits text into pieces of at most max_bytes UTF-8 bytes, after clause boundaries where possible."""
+    if len(text.encode("utf-8")) <= max_bytes:
+        return [text]
+    pieces = []
+    for clause in _split_after(clause_end_regexp, text):
+        if len(clause.encode("utf-8")) <= max_bytes:
+            pieces.append(clause)
+            continue
+        # no usable boundary; split between characters
+        start = 0
+        size = 0
+        for i, ch in enumerate(clause):
+            ch_bytes = len(ch.encode("utf-8"))
+            if size + ch_bytes > max_bytes:
+                pieces.append(clause[start:i])
+                start = i
+                size = 0
+            size += ch_bytes
+        pieces.append(clause[start:])
+    return pieces
+
+
+def chunk_on_sentences(text: str, chunk_size: int, max_bytes: int) -> list[str]:
+    """Splits text into chunks of at least chunk_size characters (except the last) and at most max_bytes UTF-8 bytes.
+
+    Chunks end at sentence boundaries where possible. Sentences too long to fit in max_bytes are
+    split after clause punctuation or whitespace, or failing that, between any two characters.
+    """
+    chunks = []
+    chunk = []
+    chunk_length = 0
+    chunk_bytes = 0
+    for sentence in _split_after(sentence_end_regexp, text):
+        for piece in _split_to_bytes(sentence, max_bytes):
+            piece_bytes = len(piece.encode("utf-8"))
+            if chunk and chunk_bytes + piece_bytes > max_bytes:
+                chunks.append("".join(chunk))
+                chunk, chunk_length, chunk_bytes = [], 0, 0
+            chunk.append(piece)
+            chunk_length += len(piece)
+            chunk_bytes += piece_bytes
+            if chunk_length >= chunk_size:
+                chunks.append("".join(chunk))
+                chunk, chunk_length, chunk_bytes = [], 0, 0
+    if chunk:
+        chunks.append("".join(chunk))
+    return chunks
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+import logging
+
+logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesces concurrent calls that share a key into a single computation.
+
+    The first caller for a key starts the computation; callers arriving while it is
+    still pending await the same result instead of starting their own. At most
+    `max_pending` keys are tracked at once; calls beyond that run uncoalesced.
+
+    A caller that is cancelled only stops waiting; the shared computation keeps
+    running for the remaining callers.
+    """
+
+    def __init__(self, max_pending: int = 1024):
+        self.max_pending = max_pending
+        self.pending: dict[K, asyncio.Future[V]] = {}
+        # number of calls that started a computation
+        self.executed = 0
+        # number of calls that awaited a computation started by another call
+        self.coalesced = 0
+        # number of calls that ran uncoalesced because the pending table was full
+        self.bypassed = 0
+
+    async def run(self, key: K, compute: Callable[[], Awaitable[V]]) -> V:
+        future = self.pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        if len(self.pending) >= self.max_pending:
+            self.bypassed += 1
+            return await compute()
+
+        self.executed += 1
+        future = asyncio.ensure_future(compute())
+        self.pending[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: K, future: asyncio.Future[V]):
+        if self.pending.get(key) is future:
+            del self.pending[key]
+        # mark the exception as retrieved in case every caller was cancelled before it was raised
+        if not future.cancelled() and future.exception() is not None:
+            logging.debug(f"Coalesced computation for {key} failed: {future.exception()}")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+            "pending": len(self.pending),
+        }
@@ -11,9 +11,11 @@ class Language(Enum):
 class AnnotateRequest(BaseModel):
     base_text: str
     language: Language
+    # name of a custom reading dictionary layered over the base dictionary
+    dictionary: Optional[str] = None
 
     def __repr__(self):
-        return f"AnnotateRequest(language={self.language})"
+        return f"AnnotateRequest(language={self.language}, dictionary={self.dictionary})"
 
 
 class Annotation(BaseModel):
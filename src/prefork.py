@@ -0,0 +1,192 @@
+"""Pre-fork server.
+
+Loads the application (and with it the furigana dictionary and Sudachi) once in a
+master process, freezes the loaded heap out of the garbage collector's reach, and
+then forks the workers, so the dictionary pages stay shared between workers instead
+of each worker holding its own copy.
+
+Run with:
+
+    python -m src.prefork --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+from typing import NamedTuple
+
+import uvicorn
+
+import logging
+
+logging.getLogger(__name__)
+
+# workers that exit sooner than this many seconds after starting are respawned with exponential backoff
+MIN_WORKER_UPTIME = 5
+MIN_RESPAWN_DELAY = 1
+MAX_RESPAWN_DELAY = 30
+# signals the master handles; workers must never run the master's handlers for them
+MASTER_SIGNALS = {signal.SIGINT, signal.SIGTERM, signal.SIGUSR1, signal.SIGALRM}
+
+
+class MemoryUsage(NamedTuple):
+    """Memory usage of a process in kB, as reported by /proc/<pid>/smaps_rollup"""
+
+    rss: int
+    pss: int
+    shared: int
+    private: int
+
+
+def read_memory_usage(pid: int) -> MemoryUsage | None:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            fields = {
+                name: int(value.split()[0])
+                for name, value in (line.split(":", 1) for line in f.readlines()[1:])
+            }
+    except (OSError, ValueError):
+        return None
+    return MemoryUsage(
+        rss=fields["Rss"],
+        pss=fields["Pss"],
+        shared=fields["Shared_Clean"] + fields["Shared_Dirty"],
+        private=fields["Private_Clean"] + fields["Private_Dirty"],
+    )
+
+
+def log_memory_report(master_pid: int, worker_pids: list[int]):
+    for role, pid in [("master", master_pid), *(("worker", pid) for pid in worker_pids)]:
+        usage = read_memory_usage(pid)
+        if usage is None:
+            logging.info(f"{role} {pid}: memory usage unavailable")
+            continue
+        logging.info(
+            f"{role} {pid}: rss={usage.rss} kB pss={usage.pss} kB "
+            f"shared={usage.shared} kB private={usage.private} kB"
+        )
+
+
+def serve(app, sock: socket.socket):
+    # drop the master's handlers; uvicorn installs its own for SIGINT and SIGTERM
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+    # workers share the master's command line, so `pkill -USR1 -f src.prefork` reaches them too;
+    # the default action for these would terminate them
+    for signum in (signal.SIGUSR1, signal.SIGALRM):
+        signal.signal(signum, signal.SIG_IGN)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+    gc.enable()
+    uvicorn.Server(uvicorn.Config(app)).run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket, workers: dict[int, float]) -> int:
+    """Forks a worker serving app on sock, and records it in workers with its start time."""
+    # move everything allocated so far into the permanent generation, so collections in the
+    # worker never touch (and so never copy) the pages holding it
+    gc.freeze()
+    # hold signals across the fork, so the worker never runs the master's handlers and the
+    # master never handles a shutdown without knowing about the new worker
+    signal.pthread_sigmask(signal.SIG_BLOCK, MASTER_SIGNALS)
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            serve(app, sock)
+        except BaseException:
+            logging.exception("Worker failed")
+            status = 1
+        finally:
+            os._exit(status)
+    workers[pid] = time.monotonic()
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+    return pid
+
+
+def run_master(app, sock: socket.socket, worker_count: int, report_delay: int):
+    """Forks worker_count workers serving app on sock, and respawns them until asked to stop."""
+    # maps worker pids to when they were started
+    workers: dict[int, float] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            os.kill(pid, signal.SIGTERM)
+
+    def report(signum, frame):
+        log_memory_report(os.getpid(), sorted(workers))
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGUSR1, report)
+    signal.signal(signal.SIGALRM, report)
+    signal.alarm(report_delay)
+
+    for _ in range(worker_count):
+        if not stopping:
+            spawn_worker(app, sock, workers)
+    logging.info(f"Froze {gc.get_freeze_count()} objects")
+    host, port = sock.getsockname()[:2]
+    logging.info(f"Serving on {host}:{port} with workers {sorted(workers)}")
+
+    respawn_delay = 0
+    while workers:
+        pid, status = os.wait()
+        started = workers.pop(pid)
+        if stopping:
+            continue
+
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            respawn_delay = min(max(MIN_RESPAWN_DELAY, respawn_delay * 2), MAX_RESPAWN_DELAY)
+        else:
+            respawn_delay = 0
+        logging.warning(
+            f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; "
+            f"respawning in {respawn_delay}s"
+        )
+        # sleep in short steps so a shutdown request is not held up by the backoff
+        respawn_at = time.monotonic() + respawn_delay
+        while not stopping and time.monotonic() < respawn_at:
+            time.sleep(0.1)
+        if not stopping:
+            pid = spawn_worker(app, sock, workers)
+            logging.info(f"Respawned worker {pid}")
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--report-delay",
+        type=int,
+        default=10,
+        help="seconds after startup to log per-worker memory usage (0 disables it); send SIGUSR1 for a report at any time",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(message)s")
+
+    # collecting while the application loads would leave freed gaps in the pages the workers
+    # share, which they would then dirty by allocating into; the master never collects again
+    gc.disable()
+    start = time.perf_counter()
+    from .app import app
+
+    logging.info(f"Loaded application in {time.perf_counter() - start:.1f}s")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+
+    run_master(app, sock, args.workers, args.report_delay)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
-from typing import NamedTuple, Protocol, Dict
+from collections import ChainMap
+from pathlib import Path
+from typing import Mapping, NamedTuple, Protocol, Dict
 import json
+import logging
+
+logging.getLogger(__name__)
 
 
 class PronunciationDatum(NamedTuple):
@@ -16,6 +21,57 @@ class CjkPronunciationEntry(NamedTuple):
 class CjkPronunciationProvider(Protocol):
     def __getitem__(self, text: str) -> list[CjkPronunciationEntry]: ...
 
+    def __contains__(self, text: str) -> bool: ...
+
+
+class LayeredPronunciationProvider:
+    """Stacks small named overlay dictionaries over one shared base dictionary.
+
+    Each overlay only holds its own entries; the base is never copied. Views returned
+    by `for_dictionary` are read-only and shared between requests: lookups check the
+    overlay before falling through to the base.
+    """
+
+    def __init__(
+        self,
+        base: CjkPronunciationProvider,
+        resolved_readings: dict[str, dict[str, str | None]] | None = None,
+    ):
+        self.base = base
+        # readings precomputed against the base dictionary; see load_resolved_readings
+        self.resolved_readings = resolved_readings if resolved_readings is not None else {}
+        self.overlays: Dict[str, dict[str, list[CjkPronunciationEntry]]] = {}
+
+    def register_overlay(
+        self, name: str, overlay: dict[str, list[CjkPronunciationEntry]]
+    ):
+        self.overlays[name] = overlay
+
+    def resolve_name(self, name: str | None) -> str | None:
+        """Returns name if an overlay is registered under it, or None for the base dictionary.
+
+        Raises KeyError if name is not a registered overlay.
+        """
+        if name is not None and name not in self.overlays:
+            raise KeyError(name)
+        return name
+
+    def for_dictionary(self, name: str | None) -> CjkPronunciationProvider:
+        name = self.resolve_name(name)
+        if name is None:
+            return self.base
+        return ChainMap(self.overlays[name], self.base)
+
+    def resolved_readings_for_dictionary(
+        self, name: str | None
+    ) -> Mapping[str, dict[str, str | None]]:
+        if name not in self.overlays:
+            return self.resolved_readings
+        # words the overlay redefines were not part of the precomputation, so mask them out
+        return ChainMap(
+            {text: {} for text in self.overlays[name]}, self.resolved_readings
+        )
+
 
 def load_furigana_json(data_path: str) -> CjkPronunciationProvider:
     furigana_data = {}
@@ -39,3 +95,39 @@ def load_furigana_json(data_path: str) -> CjkPronunciationProvider:
                 )
             furigana_data[key] = processed_entries
     return furigana_data
+
+
+def load_resolved_readings(data_path: str) -> dict[str, dict[str, str | None]]:
+    """Loads the reading disambiguation table written by update_dictionaries.py.
+
+    Maps dictionary text, then sudachi's reading of its dictionary form, to the pronunciation of
+    the best fitting entry for that text, or None if no entry fits. Returns an empty table if the
+    file is missing.
+    """
+    try:
+        with open(data_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logging.warning(
+            f"No resolved readings found at {data_path}; readings will be resolved at request time."
+        )
+        return {}
+
+
+def load_furigana_overlays(
+    base: CjkPronunciationProvider,
+    overlay_dir: str | None,
+    resolved_readings: dict[str, dict[str, str | None]] | None = None,
+) -> LayeredPronunciationProvider:
+    """Wraps `base` and registers every `<name>.json` in `overlay_dir` as an overlay called `<name>`.
+
+    Overlay files use the same format as the base dictionary.
+    """
+    provider = LayeredPronunciationProvider(base, resolved_readings)
+    if not overlay_dir:
+        return provider
+    for overlay_path in sorted(Path(overlay_dir).glob("*.json")):
+        provider.register_overlay(
+            overlay_path.stem, load_furigana_json(str(overlay_path))
+        )
+    return provider
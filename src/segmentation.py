@@ -1,13 +1,22 @@
-from typing import NamedTuple, Protocol
+from typing import Iterator, NamedTuple, Protocol
 from .models import AnnotateRequest, Language
 import sudachipy
+from sudachipy.errors import SudachiError
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
 from enum import Enum
-from .cjk_util import segment_on_han, katakana_to_hiragana
+from .cjk_util import chunk_on_sentences, segment_on_han, katakana_to_hiragana
 
 logging.getLogger(__name__)
 
 
+class SegmentationFailed(Exception):
+    pass
+
+
 class PhoneticSystem(Enum):
     HIRAGANA = "hiragana"
 
@@ -24,11 +33,16 @@ class Lexeme(NamedTuple):
     # if a lexeme is invariant, base_form will be None; otherwise, it contains the uninflected form of the lexeme
     base_form: str | None = None
     pronunciation: Pronunciation | None = None
+    # pronunciation of the uninflected form, if base_form is set and it is known
+    base_form_pronunciation: Pronunciation | None = None
 
 
 class SegmentationProvider(Protocol):
     def segment(self, text: str) -> list[Lexeme]: ...
 
+    # lazily yields lexemes; raises SegmentationFailed if the lexemes turn out not to cover the text
+    def iter_segment(self, text: str) -> Iterator[Lexeme]: ...
+
     def can_segment(self, request: AnnotateRequest) -> bool: ...
 
 
@@ -36,36 +50,122 @@ class DefaultSegmenter:
     def __init__(self):
         pass
 
-    def segment(base_text: str) -> list[Lexeme]:
-        return segment_on_han(base_text)
+    def segment(self, base_text: str) -> list[Lexeme]:
+        return [
+            Lexeme(base_text[segment.indices[0] : segment.indices[1]])
+            for segment in segment_on_han(base_text)
+        ]
 
+    def iter_segment(self, base_text: str) -> Iterator[Lexeme]:
+        return iter(self.segment(base_text))
 
-class JapaneseSegmenter:
+    def can_segment(self, request: AnnotateRequest) -> bool:
+        return True
 
-    def __init__(self):
+
+class JapaneseSegmenter:
+    # sudachi rejects inputs over 49149 UTF-8 bytes, so longer texts are always tokenized in chunks
+    MAX_CHUNK_BYTES = 49149
+
+    def __init__(
+        self,
+        # texts at least this many characters long are split into one sentence-aligned chunk
+        # per worker and tokenized in parallel; None disables parallel tokenization
+        parallel_threshold: int | None = None,
+        max_workers: int | None = None,
+    ):
         super().__init__()
-        self.tokenizer = sudachipy.Dictionary().create()
+        self.dictionary = sudachipy.Dictionary()
+        # sudachi tokenizers are not safe to share between threads, so each thread gets its own
+        self._local = threading.local()
+        # maps sudachi word ids of inflected forms to the reading of their dictionary form
+        self._dictionary_form_readings: dict[int, str] = {}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # parallel tokenization is disabled when there is no threshold or only a single worker
+        self.parallel_threshold = parallel_threshold if self.max_workers > 1 else None
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="sudachi"
+            )
+            if self.parallel_threshold
+            else None
+        )
+
+    @property
+    def tokenizer(self) -> sudachipy.Tokenizer:
+        tokenizer = getattr(self._local, "tokenizer", None)
+        if tokenizer is None:
+            tokenizer = self._local.tokenizer = self.dictionary.create()
+        return tokenizer
 
     def segment(self, text: str) -> list[Lexeme]:
+        try:
+            return list(self.iter_segment(text))
+        except SegmentationFailed as e:
+            logging.error(e)
+            return []
 
-        segments = [
-            Lexeme(
-                token.surface(),
-                (
-                    token.normalized_form()
-                    if token.normalized_form() != token.surface()
-                    else None
-                ),
-                Pronunciation(PhoneticSystem.HIRAGANA, katakana_to_hiragana(token.reading_form()))
+    def iter_segment(self, text: str) -> Iterator[Lexeme]:
+        if self.parallel_threshold and len(text) >= self.parallel_threshold:
+            chunks = chunk_on_sentences(
+                text, ceil(len(text) / self.max_workers), self.MAX_CHUNK_BYTES
             )
-            for token in self.tokenizer.tokenize(text)
-        ]
-        if "".join(token.surface for token in segments) != text:
-            logging.error(
+            # chunks are tokenized concurrently, but yielded in order
+            for lexemes in self._executor.map(
+                lambda chunk: list(self._tokenize(chunk)), chunks
+            ):
+                yield from lexemes
+        elif len(text.encode("utf-8")) > self.MAX_CHUNK_BYTES:
+            for chunk in chunk_on_sentences(text, len(text), self.MAX_CHUNK_BYTES):
+                yield from self._tokenize(chunk)
+        else:
+            yield from self._tokenize(text)
+
+    def _tokenize(self, text: str) -> Iterator[Lexeme]:
+        try:
+            tokens = self.tokenizer.tokenize(text)
+        except SudachiError as e:
+            raise SegmentationFailed(f"Tokenization failed for {text}: {e}") from e
+        covered = 0
+        for token in tokens:
+            surface = token.surface()
+            if token.begin() != covered:
+                break
+            covered = token.end()
+            normalized_form = token.normalized_form()
+            if normalized_form == surface:
+                yield Lexeme(
+                    surface,
+                    None,
+                    Pronunciation(PhoneticSystem.HIRAGANA, katakana_to_hiragana(token.reading_form())),
+                )
+                continue
+            yield Lexeme(
+                surface,
+                normalized_form,
+                Pronunciation(PhoneticSystem.HIRAGANA, katakana_to_hiragana(token.reading_form())),
+                Pronunciation(PhoneticSystem.HIRAGANA, self._dictionary_form_reading(token)),
+            )
+        if covered != len(text):
+            raise SegmentationFailed(
                 f"Tokenization failed for {text}; sudachi tokenization does not cover whole text"
             )
-            return []
-        return segments
+
+    def _dictionary_form_reading(self, token: sudachipy.Morpheme) -> str:
+        if token.dictionary_form() == token.surface():
+            return katakana_to_hiragana(token.reading_form())
+        reading = self._dictionary_form_readings.get(token.word_id())
+        if reading is None:
+            # read the dictionary form the same way update_dictionaries.py does, falling back to the
+            # inflected reading if it does not come back as a single morpheme
+            dictionary_form = self.tokenizer.tokenize(token.dictionary_form())
+            reading = katakana_to_hiragana(
+                dictionary_form[0].reading_form()
+                if len(dictionary_form) == 1
+                else token.reading_form()
+            )
+            self._dictionary_form_readings[token.word_id()] = reading
+        return reading
 
     def can_segment(self, request: AnnotateRequest) -> bool:
         return request.language == Language.JAPANESE
@@ -1,17 +1,13 @@
-from typing import Iterator, Generic, TypeVar
-from .segmentation import Lexeme, SegmentationProvider
+from typing import Callable, Iterator, Generic, TypeVar
+from .segmentation import Lexeme, SegmentationFailed, SegmentationProvider
 from .annotation import AnnotationProvider, DefaultAnnotator
-from .models import AnnotateRequest, AnnotatedTextSegment
+from .models import AnnotateRequest, AnnotatedTextSegment, Language
 
 import logging
 
 logging.getLogger(__name__)
 
 
-class SegmentationFailed(Exception):
-    pass
-
-
 class AnnotationFailed(Exception):
     pass
 
@@ -31,40 +27,105 @@ class PriorityRegistry(Generic[T]):
         for item, _ in self.registry:
             yield item
 
+    def compile(
+        self, accepts: Callable[[T, AnnotateRequest], bool]
+    ) -> dict[Language, list[T]]:
+        """Resolves, for every language, the ordered fallback chain of items that accept it.
 
-# TODO there might be a way to refactor the prioritization logic out of these two services
+        Providers decide on `can_segment`/`can_annotate` from the request language alone, so
+        a probe request per language is enough to precompute the chains.
+        """
+        return {
+            language: [
+                item
+                for item in self
+                if accepts(item, AnnotateRequest(base_text="", language=language))
+            ]
+            for language in Language
+        }
 
 
 class SegmentationService:
     def __init__(self, registry: PriorityRegistry[SegmentationProvider]):
         self.registry = registry
+        self.pipelines = registry.compile(
+            lambda segmenter, request: segmenter.can_segment(request)
+        )
 
     def segment(self, annotate_request: AnnotateRequest) -> list[Lexeme]:
-        for segmenter in self.registry:
-            if segmenter.can_segment(annotate_request):
-                result = segmenter.segment(annotate_request.base_text)
+        for segmenter in self.pipelines[annotate_request.language]:
+            result = segmenter.segment(annotate_request.base_text)
             if result:
                 return result
-            else:
-                logging.error(
-                    f"Attempted to segment with segmenter of type {segmenter.__class__.__name__} but failed."
-                )
+            logging.error(
+                f"Attempted to segment with segmenter of type {segmenter.__class__.__name__} but failed."
+            )
         raise SegmentationFailed(f"No suitable segmenter found for {annotate_request}.")
 
 
 class SegmentAnnotationService:
     def __init__(self, registry: PriorityRegistry[AnnotationProvider]):
         self.registry = registry
+        self.pipelines = registry.compile(
+            lambda annotator, request: annotator.can_annotate(request)
+        )
 
     def annotate(
         self, annotate_request: AnnotateRequest, lexemes: list[Lexeme]
     ) -> list[AnnotatedTextSegment]:
-        for annotator in self.registry:
-            if annotator.can_annotate(annotate_request):
+        for annotator in self.pipelines[annotate_request.language]:
+            try:
+                return annotator.annotate(lexemes)
+            except Exception as e:
+                logging.error(
+                    f"Annotator {annotator.__class__.__name__} failed with error: {e}; skipping."
+                )
+        raise AnnotationFailed(f"No suitable annotator found for {annotate_request}")
+
+
+class SegmentAnnotatePipeline:
+    """Runs segmentation followed by annotation for a request.
+
+    In fused mode, annotators consume lexemes as the segmenter produces them instead of
+    going through an intermediate list; each fallback attempt re-segments the text.
+    """
+
+    def __init__(
+        self,
+        segmentation_service: SegmentationService,
+        segment_annotation_service: SegmentAnnotationService,
+        fused: bool = False,
+    ):
+        self.segmentation_service = segmentation_service
+        self.segment_annotation_service = segment_annotation_service
+        self.fused = fused
+
+    def run(self, annotate_request: AnnotateRequest) -> list[AnnotatedTextSegment]:
+        # segmenters signal failure with an empty result, so empty text never reaches them
+        if not annotate_request.base_text:
+            return []
+        if not self.fused:
+            segments = self.segmentation_service.segment(annotate_request)
+            return self.segment_annotation_service.annotate(annotate_request, segments)
+
+        language = annotate_request.language
+        for segmenter in self.segmentation_service.pipelines[language]:
+            for annotator in self.segment_annotation_service.pipelines[language]:
                 try:
-                    return annotator.annotate(lexemes)
+                    return annotator.annotate(
+                        segmenter.iter_segment(annotate_request.base_text)
+                    )
+                except SegmentationFailed as e:
+                    logging.error(
+                        f"Segmenter {segmenter.__class__.__name__} failed with error: {e}; skipping."
+                    )
+                    break
                 except Exception as e:
                     logging.error(
                         f"Annotator {annotator.__class__.__name__} failed with error: {e}; skipping."
                     )
-        raise AnnotationFailed(f"No suitable annotator found for {annotate_request}")
+            else:
+                raise AnnotationFailed(
+                    f"No suitable annotator found for {annotate_request}"
+                )
+        raise SegmentationFailed(f"No suitable segmenter found for {annotate_request}.")
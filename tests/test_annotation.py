@@ -1,5 +1,5 @@
 import pytest
-from src.annotation import DefaultAnnotator, FuriganaAnnotator
+from src.annotation import DefaultAnnotator, FuriganaAnnotator, resolve_reading
 from src.models import AnnotateRequest, Language, AnnotatedTextSegment, Annotation
 from src.segmentation import Lexeme, PhoneticSystem, Pronunciation
 from src.pronunciation import CjkPronunciationEntry, PronunciationDatum
@@ -124,3 +124,51 @@ class TestFuriganaAnnotator:
             AnnotatedTextSegment(indices=(14, 16))
         ]
         assert result == expected
+
+    def test_furigana_annotate_uses_resolved_readings(self, mock_furigana_provider):
+        """Test precomputed readings are used instead of fuzzy matching at request time"""
+        lexemes = [Lexeme(surface="人間", pronunciation=Pronunciation(PhoneticSystem.HIRAGANA, "じんかん"))]
+
+        annotator = FuriganaAnnotator(mock_furigana_provider, {"人間": {"じんかん": "にんげん"}})
+        assert annotator.annotate(lexemes) == [
+            AnnotatedTextSegment(indices=(0, 2), annotations=[
+                Annotation(indices=(0, 1), annotation_text="にん"),
+                Annotation(indices=(1, 2), annotation_text="げん"),
+            ])
+        ]
+
+        # None means no entry fits the reading
+        annotator = FuriganaAnnotator(mock_furigana_provider, {"人間": {"じんかん": None}})
+        assert annotator.annotate(lexemes) == [
+            AnnotatedTextSegment(indices=(0, 1), annotations=[Annotation(indices=(0, 1))]),
+            AnnotatedTextSegment(indices=(1, 2), annotations=[Annotation(indices=(1, 2))]),
+        ]
+
+    def test_furigana_annotate_ignores_stale_resolved_readings(self, mock_furigana_provider):
+        """Test a resolved pronunciation no longer in the dictionary falls back to fuzzy matching"""
+        lexemes = [Lexeme(surface="先生", pronunciation=Pronunciation(PhoneticSystem.HIRAGANA, "せんせ"))]
+        annotator = FuriganaAnnotator(mock_furigana_provider, {"先生": {"せんせ": "せんじょう"}})
+        assert annotator.annotate(lexemes) == [
+            AnnotatedTextSegment(indices=(0, 2), annotations=[
+                Annotation(indices=(0, 1), annotation_text="せん"),
+                Annotation(indices=(1, 2), annotation_text="せい"),
+            ])
+        ]
+
+    def test_dictionary_key_uses_base_form_pronunciation(self, mock_furigana_provider):
+        """Test inflected lexemes are matched by the pronunciation of their uninflected form"""
+        annotator = FuriganaAnnotator(mock_furigana_provider)
+        lexeme = Lexeme(
+            "呼ん",
+            "呼ぶ",
+            Pronunciation(PhoneticSystem.HIRAGANA, "よん"),
+            Pronunciation(PhoneticSystem.HIRAGANA, "よぶ"),
+        )
+        assert annotator.dictionary_key(lexeme) == ("呼ぶ", Pronunciation(PhoneticSystem.HIRAGANA, "よぶ"))
+        assert annotator.dictionary_key(Lexeme("猫")) is None
+
+
+def test_resolve_reading():
+    """Test resolve_reading picks the closest pronunciation, or None if none are close"""
+    assert resolve_reading("わたくし", ["あたし", "わたし"]) == 1
+    assert resolve_reading("かん", ["ひと"]) is None
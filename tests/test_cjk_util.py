@@ -4,6 +4,7 @@ from src.cjk_util import (
     segment_on_han,
     is_han_regexp,
     contains_han_regexp,
+    chunk_on_sentences,
 )
 from src.models import AnnotatedTextSegment, Annotation
 
@@ -140,3 +141,38 @@ class TestSegmentOnHan:
                 indices=(3, 4), annotations=[Annotation(indices=(3, 4))]
             ),
         ]
+
+
+class TestChunkOnSentences:
+    def test_chunk_on_sentences(self):
+        """Test chunks end on sentence boundaries and cover the whole text"""
+        text = "私は学生です。「本当？」と聞いた。先生だ"
+        result = chunk_on_sentences(text, 5, 1000)
+        assert result == ["私は学生です。", "「本当？」", "と聞いた。", "先生だ"]
+        assert "".join(result) == text
+
+    def test_chunk_on_sentences_merges_short_sentences(self):
+        """Test short sentences are merged until the chunk size is reached"""
+        text = "はい。いいえ。はい。"
+        assert chunk_on_sentences(text, 5, 1000) == ["はい。いいえ。", "はい。"]
+
+    def test_chunk_on_sentences_no_boundary(self):
+        """Test text without sentence boundaries stays a single chunk if it fits"""
+        assert chunk_on_sentences("漢字です", 1, 1000) == ["漢字です"]
+
+    def test_chunk_on_sentences_caps_bytes_at_last_sentence_boundary(self):
+        """Test a chunk is closed at the last sentence boundary before the byte cap"""
+        # each sentence is 9 bytes
+        text = "はい。" * 3
+        assert chunk_on_sentences(text, 100, 20) == ["はい。はい。", "はい。"]
+
+    def test_chunk_on_sentences_splits_long_sentences_on_clauses(self):
+        """Test sentences over the byte cap are split after clause boundaries"""
+        text = "あいう、えお、かき。"
+        assert chunk_on_sentences(text, 100, 12) == ["あいう、", "えお、", "かき。"]
+
+    def test_chunk_on_sentences_hard_splits(self):
+        """Test text with no boundaries is split between characters to respect the byte cap"""
+        text = "あ" * 10
+        result = chunk_on_sentences(text, 100, 9)
+        assert result == ["あああ", "あああ", "あああ", "あ"]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from src.coalescing import SingleFlight
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_are_coalesced(self):
+        """Test concurrent calls with the same key share a single computation"""
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(single_flight.run("key", compute) for _ in range(5)))
+        assert results == [1] * 5
+        assert calls == 1
+        assert single_flight.stats() == {"executed": 1, "coalesced": 4, "bypassed": 0, "pending": 0}
+
+    async def test_distinct_keys_are_not_coalesced(self):
+        """Test calls with different keys each run their own computation"""
+        single_flight = SingleFlight()
+
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            single_flight.run("a", lambda: compute("a")),
+            single_flight.run("b", lambda: compute("b")),
+        )
+        assert results == ["a", "b"]
+        assert single_flight.executed == 2
+
+    async def test_full_table_bypasses_coalescing(self):
+        """Test calls beyond max_pending run uncoalesced"""
+        single_flight = SingleFlight(max_pending=1)
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        await asyncio.gather(
+            single_flight.run("a", compute),
+            single_flight.run("b", compute),
+        )
+        assert single_flight.stats() == {"executed": 1, "coalesced": 0, "bypassed": 1, "pending": 0}
+
+    async def test_exceptions_are_shared(self):
+        """Test every coalesced caller sees the computation's exception"""
+        single_flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(single_flight.run("key", compute) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        assert single_flight.pending == {}
+
+    async def test_cancelled_caller_does_not_cancel_computation(self):
+        """Test cancelling the first caller leaves the computation running for the others"""
+        single_flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.create_task(single_flight.run("key", compute))
+        second = asyncio.create_task(single_flight.run("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == "done"
+        assert single_flight.pending == {}
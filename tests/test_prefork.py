@@ -0,0 +1,81 @@
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from src.prefork import read_memory_usage
+
+
+class TestReadMemoryUsage:
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requires /proc")
+    def test_read_memory_usage(self):
+        """Test memory usage of the current process is split into shared and private memory"""
+        usage = read_memory_usage(os.getpid())
+        assert usage.rss > 0
+        assert usage.shared + usage.private == usage.rss
+
+    def test_read_memory_usage_missing_process(self):
+        """Test memory usage of a nonexistent process is unavailable"""
+        assert read_memory_usage(-1) is None
+
+
+MASTER_SCRIPT = """
+import logging, socket, sys
+from src import prefork
+
+prefork.MIN_RESPAWN_DELAY = 0.2
+logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+
+async def app(scope, receive, send):
+    pass
+
+
+sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+sock.bind(("127.0.0.1", 0))
+sock.listen()
+prefork.run_master(app, sock, 1, 0)
+"""
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_run_master_respawns_workers_with_backoff():
+    """Test killed workers are respawned after a growing delay, and survive SIGUSR1"""
+    master = subprocess.Popen(
+        [sys.executable, "-c", MASTER_SCRIPT],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    lines = queue.Queue()
+    threading.Thread(target=lambda: [lines.put(line) for line in master.stdout], daemon=True).start()
+
+    def wait_for(pattern: str) -> re.Match:
+        while True:
+            match = re.search(pattern, lines.get(timeout=10))
+            if match:
+                return match
+
+    try:
+        worker = int(wait_for(r"with workers \[(\d+)\]").group(1))
+        time.sleep(0.5)
+        os.kill(worker, signal.SIGUSR1)
+        time.sleep(0.5)
+        # raises if the worker was terminated
+        os.kill(worker, 0)
+
+        delays = []
+        for _ in range(2):
+            os.kill(worker, signal.SIGKILL)
+            delays.append(float(wait_for(rf"Worker {worker} exited .* respawning in ([\d.]+)s").group(1)))
+            worker = int(wait_for(r"Respawned worker (\d+)").group(1))
+        assert delays == [0.2, 0.4]
+    finally:
+        master.terminate()
+        assert master.wait(timeout=10) == 0
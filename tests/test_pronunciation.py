@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from src.pronunciation import (
+    CjkPronunciationEntry,
+    LayeredPronunciationProvider,
+    PronunciationDatum,
+    load_furigana_overlays,
+)
+
+
+def entry(text: str, pronunciation: str) -> CjkPronunciationEntry:
+    return CjkPronunciationEntry(
+        text=text,
+        pronunciation=pronunciation,
+        per_char=[PronunciationDatum(indices=(0, len(text)), pronunciation=pronunciation)],
+    )
+
+
+class TestLayeredPronunciationProvider:
+    def test_overlay_takes_precedence(self):
+        """Test overlay entries shadow base entries and misses fall through to the base"""
+        base = {"私": [entry("私", "わたし")], "東": [entry("東", "ひがし")]}
+        provider = LayeredPronunciationProvider(base)
+        provider.register_overlay("acme", {"東": [entry("東", "あずま")]})
+
+        view = provider.for_dictionary("acme")
+        assert view["東"] == [entry("東", "あずま")]
+        assert view["私"] == [entry("私", "わたし")]
+        assert "私" in view
+        assert "猫" not in view
+
+    def test_base_dictionary_view_is_the_base(self):
+        """Test the base dictionary is used directly, without an extra layer"""
+        base = {"私": [entry("私", "わたし")]}
+        provider = LayeredPronunciationProvider(base)
+        assert provider.for_dictionary(None) is base
+
+    def test_unknown_dictionary_is_rejected(self):
+        """Test an unregistered dictionary name is rejected rather than falling back to the base"""
+        base = {"私": [entry("私", "わたし")]}
+        provider = LayeredPronunciationProvider(base)
+        assert provider.resolve_name(None) is None
+        with pytest.raises(KeyError):
+            provider.resolve_name("missing")
+        with pytest.raises(KeyError):
+            provider.for_dictionary("missing")
+
+    def test_resolved_readings_mask_overlay_words(self):
+        """Test precomputed readings are not used for words an overlay redefines"""
+        base = {"私": [entry("私", "わたし")], "東": [entry("東", "ひがし")]}
+        provider = LayeredPronunciationProvider(base, {"私": {"わたくし": "わたし"}, "東": {"とう": "ひがし"}})
+        provider.register_overlay("acme", {"東": [entry("東", "あずま")]})
+
+        resolved = provider.resolved_readings_for_dictionary("acme")
+        assert resolved["私"] == {"わたくし": "わたし"}
+        assert resolved["東"] == {}
+        assert provider.resolved_readings_for_dictionary(None) is provider.resolved_readings
+
+
+def test_load_furigana_overlays(tmp_path):
+    """Test every json file in the directory is registered under its stem"""
+    with open(tmp_path / "acme.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {"東": [{"pronunciation": "あずま", "per_char": [{"indices": [0, 1], "pronunciation": "あずま"}]}]},
+            f,
+            ensure_ascii=False,
+        )
+    provider = load_furigana_overlays({}, str(tmp_path))
+    assert list(provider.overlays) == ["acme"]
+    assert provider.for_dictionary("acme")["東"] == [entry("東", "あずま")]
@@ -0,0 +1,53 @@
+import pytest
+from src.segmentation import JapaneseSegmenter, PhoneticSystem, Pronunciation
+
+
+@pytest.fixture(scope="module")
+def serial_segmenter():
+    return JapaneseSegmenter(parallel_threshold=None)
+
+
+@pytest.fixture(scope="module")
+def parallel_segmenter():
+    return JapaneseSegmenter(parallel_threshold=16, max_workers=4)
+
+
+class TestJapaneseSegmenter:
+    def test_segment(self, serial_segmenter):
+        """Test JapaneseSegmenter segment"""
+        result = serial_segmenter.segment("私は学生です")
+        assert [lexeme.surface for lexeme in result] == ["私", "は", "学生", "です"]
+        assert result[2].pronunciation == Pronunciation(PhoneticSystem.HIRAGANA, "がくせい")
+
+    def test_segment_base_form_pronunciation(self, serial_segmenter):
+        """Test inflected lexemes carry the pronunciation of their dictionary form"""
+        result = serial_segmenter.segment("食べた")
+        assert result[0].surface == "食べ"
+        assert result[0].base_form == "食べる"
+        assert result[0].pronunciation == Pronunciation(PhoneticSystem.HIRAGANA, "たべ")
+        assert result[0].base_form_pronunciation == Pronunciation(PhoneticSystem.HIRAGANA, "たべる")
+
+    def test_parallel_segment_matches_serial(self, serial_segmenter, parallel_segmenter):
+        """Test chunked parallel tokenization produces the same lexemes as serial tokenization"""
+        text = "私はその人を常に先生と呼んでいた。だからここでもただ先生と書くだけで本名は打ち明けない。\n" * 20
+        result = parallel_segmenter.segment(text)
+        assert result == serial_segmenter.segment(text)
+        assert "".join(lexeme.surface for lexeme in result) == text
+
+    def test_segment_text_longer_than_sudachi_input_limit(self, serial_segmenter):
+        """Test texts over sudachi's input size limit are tokenized in chunks"""
+        text = "私はその人を常に先生と呼んでいた。" * 2000
+        result = serial_segmenter.segment(text)
+        assert "".join(lexeme.surface for lexeme in result) == text
+
+    @pytest.mark.parametrize(
+        "text",
+        ["私はその人を常に先生と呼んでいた" * 1200, "あ" * 20000 + "。" + "私はその人を常に先生と呼んでいた" * 10],
+    )
+    def test_segment_boundary_free_text_longer_than_sudachi_input_limit(
+        self, serial_segmenter, parallel_segmenter, text
+    ):
+        """Test texts with no sentence boundary within sudachi's input size limit are still tokenized"""
+        for segmenter in [serial_segmenter, parallel_segmenter]:
+            result = segmenter.segment(text)
+            assert "".join(lexeme.surface for lexeme in result) == text
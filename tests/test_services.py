@@ -0,0 +1,109 @@
+import pytest
+from src.annotation import DefaultAnnotator
+from src.models import AnnotateRequest, AnnotatedTextSegment, Annotation, Language
+from src.segmentation import DefaultSegmenter, Lexeme, SegmentationFailed
+from src.services import (
+    AnnotationFailed,
+    PriorityRegistry,
+    SegmentAnnotatePipeline,
+    SegmentAnnotationService,
+    SegmentationService,
+)
+
+
+class FailingSegmenter:
+    def segment(self, text: str) -> list[Lexeme]:
+        return []
+
+    def iter_segment(self, text: str):
+        yield Lexeme(text[:1])
+        raise SegmentationFailed("does not cover whole text")
+
+    def can_segment(self, request: AnnotateRequest) -> bool:
+        return request.language == Language.JAPANESE
+
+
+class FailingAnnotator:
+    def annotate(self, lexemes):
+        raise ValueError("boom")
+
+    def can_annotate(self, request: AnnotateRequest) -> bool:
+        return True
+
+
+def build_pipeline(fused: bool) -> SegmentAnnotatePipeline:
+    segmenters = PriorityRegistry()
+    segmenters.register(FailingSegmenter(), 1)
+    segmenters.register(DefaultSegmenter(), 0)
+    annotators = PriorityRegistry()
+    annotators.register(FailingAnnotator(), 1)
+    annotators.register(DefaultAnnotator(), 0)
+    return SegmentAnnotatePipeline(
+        SegmentationService(segmenters), SegmentAnnotationService(annotators), fused=fused
+    )
+
+
+class TestPriorityRegistry:
+    def test_compile(self):
+        """Test compile resolves an ordered fallback chain per language"""
+        failing, default = FailingSegmenter(), DefaultSegmenter()
+        registry = PriorityRegistry()
+        registry.register(default, 0)
+        registry.register(failing, 1)
+        pipelines = registry.compile(lambda s, r: s.can_segment(r))
+        assert pipelines[Language.JAPANESE] == [failing, default]
+        assert pipelines[Language.CHINESE] == [default]
+
+
+class TestSegmentationService:
+    def test_segment_skips_providers_that_cannot_segment(self):
+        """Test a provider that cannot segment the language is skipped"""
+        registry = PriorityRegistry()
+        registry.register(FailingSegmenter(), 1)
+        registry.register(DefaultSegmenter(), 0)
+        service = SegmentationService(registry)
+        request = AnnotateRequest(base_text="你好", language=Language.CHINESE)
+        assert service.segment(request) == [Lexeme("你"), Lexeme("好")]
+
+    def test_segment_raises_when_chain_is_exhausted(self):
+        """Test SegmentationFailed is raised when no segmenter succeeds"""
+        registry = PriorityRegistry()
+        registry.register(FailingSegmenter(), 1)
+        service = SegmentationService(registry)
+        request = AnnotateRequest(base_text="漢字", language=Language.JAPANESE)
+        with pytest.raises(SegmentationFailed):
+            service.segment(request)
+
+
+class TestSegmentAnnotatePipeline:
+    @pytest.mark.parametrize("fused", [False, True])
+    @pytest.mark.parametrize(
+        "base_text,expected",
+        [
+            (
+                "漢です",
+                [
+                    AnnotatedTextSegment(indices=(0, 1), annotations=[Annotation(indices=(0, 1))]),
+                    AnnotatedTextSegment(indices=(1, 3)),
+                ],
+            ),
+            ("", []),
+        ],
+    )
+    def test_run_falls_back(self, fused, base_text, expected):
+        """Test both modes fall back past failing providers to the same result"""
+        request = AnnotateRequest(base_text=base_text, language=Language.JAPANESE)
+        assert build_pipeline(fused).run(request) == expected
+
+    def test_fused_run_raises_when_no_annotator_succeeds(self):
+        """Test AnnotationFailed is raised when every annotator fails"""
+        segmenters = PriorityRegistry()
+        segmenters.register(DefaultSegmenter(), 0)
+        annotators = PriorityRegistry()
+        annotators.register(FailingAnnotator(), 0)
+        pipeline = SegmentAnnotatePipeline(
+            SegmentationService(segmenters), SegmentAnnotationService(annotators), fused=True
+        )
+        request = AnnotateRequest(base_text="漢字", language=Language.JAPANESE)
+        with pytest.raises(AnnotationFailed):
+            pipeline.run(request)
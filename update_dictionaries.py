@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 import os
+import sys
 import requests
 import tarfile
 import json
 from collections import defaultdict
 
+from src.annotation import FuriganaAnnotator, resolve_reading
+from src.cjk_util import contains_han_regexp
+from src.segmentation import JapaneseSegmenter
+
 # URL of the tar.gz file to download
 url = "https://github.com/Doublevil/JmdictFurigana/releases/latest/download/JmdictFurigana.json.tar.gz"
 
@@ -51,3 +56,60 @@ for entry in raw_furigana_data:
 
 with open("JmdictFurigana.json", "w", encoding="utf-8") as f:
     json.dump(transformed_furigana_data, f, ensure_ascii=False)
+
+# precompute which entry the annotator would choose for sudachi's reading of each headword,
+# so it does not have to fuzzy match readings at request time. Headwords are uninflected, so
+# this is the same reading the annotator matches inflected lexemes by (their dictionary form's).
+segmenter = JapaneseSegmenter(parallel_threshold=None)
+resolved_readings = defaultdict(dict)
+for text, entries in transformed_furigana_data.items():
+    lexemes = segmenter.segment(text)
+    if len(lexemes) != 1 or not lexemes[0].pronunciation.value:
+        continue
+
+    reading = lexemes[0].pronunciation.value
+    pronunciations = [entry["pronunciation"] for entry in entries]
+    # exact matches are found at request time without the table
+    if reading in pronunciations:
+        continue
+
+    index = resolve_reading(reading, pronunciations)
+    resolved_readings[text][reading] = pronunciations[index] if index is not None else None
+
+with open("JmdictFuriganaResolved.json", "w", encoding="utf-8") as f:
+    json.dump(resolved_readings, f, ensure_ascii=False)
+
+print(f"resolved readings: {sum(len(readings) for readings in resolved_readings.values())}")
+
+# measure how many dictionary lookups in a sample corpus avoid fuzzy matching at request time
+corpus_path = sys.argv[1] if len(sys.argv) > 1 else "sample_corpus.txt"
+annotator = FuriganaAnnotator(transformed_furigana_data, resolved_readings)
+with open(corpus_path, "r", encoding="utf-8") as f:
+    corpus_lexemes = segmenter.segment(f.read())
+lookups = defaultdict(int)
+for lexeme in corpus_lexemes:
+    if not contains_han_regexp.match(lexeme.surface):
+        continue
+    key = annotator.dictionary_key(lexeme)
+    if key is None:
+        lookups["not in dictionary"] += 1
+        continue
+    text, reading = key
+    if not reading or reading.value in (
+        entry["pronunciation"] for entry in transformed_furigana_data[text]
+    ):
+        lookups["exact match"] += 1
+    elif reading.value in resolved_readings.get(text, {}):
+        lookups["resolved reading"] += 1
+    else:
+        lookups["fuzzy match"] += 1
+
+in_dictionary = sum(lookups.values()) - lookups["not in dictionary"]
+print(f"lexemes containing han in {corpus_path}: {sum(lookups.values())}")
+for kind in ["exact match", "resolved reading", "fuzzy match", "not in dictionary"]:
+    print(f"  {kind}: {lookups[kind]}")
+if in_dictionary:
+    print(
+        f"dictionary lookups resolved without fuzzy matching: "
+        f"{(in_dictionary - lookups['fuzzy match']) / in_dictionary:.1%}"
+    )